@@ -0,0 +1,338 @@
+import os
+import sys
+import io
+import json
+import random
+import shutil
+import string
+import subprocess
+import tempfile
+import time
+import contextlib
+import threading
+import multiprocessing
+
+import main as converter
+import library_lease
+
+# measures main.py's own overhead (scanning, json, queue, locks, safe_print, renames)
+# by running it over a synthetic library with stub encoders/decoders that only sleep and write bytes
+
+# --- synthetic library ---
+
+item_count = 200
+image_extension = 'jpg'
+image_size_min = 50 * 1024 # bytes
+image_size_max = 400 * 1024
+
+# --- stub encoders ---
+
+# per invocation, uniformly distributed
+stub_latency_min = 0.005 # seconds
+stub_latency_max = 0.015
+stub_decoder_latency_min = 0.002
+stub_decoder_latency_max = 0.005
+
+# output size as a fraction of the input size, uniformly distributed
+stub_size_ratios = {
+    'cjxl': (0.55, 0.85),
+    'cjxl-lossless': (0.75, 0.85), # --lossless_jpeg=1
+    'avifenc': (0.45, 0.9)
+}
+
+stub_fail_rate = 0.0
+
+# --- runs ---
+
+worker_counts = [1, 2, 4, 8, 16]
+keep_library = False
+
+# the same library split across this many local main.py processes via leases, [] to skip
+shard_node_counts = [2, 4]
+shard_worker_count = 2
+
+# fail (exit 1) if the first run's per-image overhead exceeds this, for ci.
+# only the first run counts, with more workers than cores the stub processes
+# compete with main.py for cpu and the gate would measure the machine instead
+max_overhead_per_image = None # seconds
+
+# same for the scan path: du, the index refresh and picking the items to convert
+max_scan_per_image = None # seconds
+
+# encoders write a header naming their source, decoders hand back the source's bytes,
+# which is what verification expects from both lossy decodes and jpg reconstruction
+stub_template = '''#!{python} -S
+import os, sys, time, random
+start = time.time()
+args = sys.argv[1:]
+name = {name!r}
+if name == 'cjxl' and '--lossless_jpeg=1' in args:
+    name = 'cjxl-lossless'
+time.sleep(random.uniform({latency_min!r}, {latency_max!r}))
+src, dst = args[-2], args[-1]
+failed = random.random() < {fail_rate!r}
+if not failed and name in ['djxl', 'avifdec']:
+    with open(src, 'rb') as file:
+        original = file.readline()[len(b'stub '):-1]
+    with open(original, 'rb') as file:
+        data = file.read()
+    with open(dst, 'wb') as file:
+        file.write(data)
+elif not failed:
+    ratio_min, ratio_max = {ratios!r}[name]
+    header = b'stub ' + os.fsencode(src) + b'\\n'
+    size = int(os.path.getsize(src) * random.uniform(ratio_min, ratio_max))
+    with open(dst, 'wb') as file:
+        file.write(header + b'\\0' * max(0, size - len(header)))
+with open({log_path!r}, 'a') as file:
+    file.write(f'{{name}} {{time.time() - start:.6f}}\\n')
+sys.exit(1 if failed else 0)
+'''
+
+def random_word(length):
+    letters = string.ascii_uppercase + string.digits
+    return ''.join(random.choice(letters) for i in range(length))
+
+def make_library(library_dir, count):
+    for i in range(count):
+        item_dir = os.path.join(library_dir, f'{random_word(13)}.info')
+        os.mkdir(item_dir)
+
+        name = f'image_{i:06d}'
+        size = random.randint(image_size_min, image_size_max)
+        with open(os.path.join(item_dir, f'{name}.{image_extension}'), 'wb') as file:
+            file.write(os.urandom(size))
+
+        metadata = {'id': os.path.basename(item_dir)[:-5], 'name': name, 'ext': image_extension, 'size': size}
+        with open(os.path.join(item_dir, 'metadata.json'), 'w') as file:
+            json.dump(metadata, file)
+
+def make_stubs(bin_dir, log_path):
+    for name in ['cjxl', 'avifenc', 'djxl', 'avifdec']:
+        is_decoder = name in ['djxl', 'avifdec']
+        source = stub_template.format(
+            python=sys.executable,
+            name=name,
+            ratios=stub_size_ratios,
+            latency_min=stub_decoder_latency_min if is_decoder else stub_latency_min,
+            latency_max=stub_decoder_latency_max if is_decoder else stub_latency_max,
+            fail_rate=stub_fail_rate,
+            log_path=log_path)
+
+        stub_path = os.path.join(bin_dir, name)
+        with open(stub_path, 'w') as file:
+            file.write(source)
+        os.chmod(stub_path, 0o755)
+
+def read_stub_log(log_path):
+    # names of the stubs that ran, lossless cjxl counted as cjxl
+    if not os.path.isfile(log_path):
+        return []
+
+    with open(log_path, 'r') as file:
+        return [line.split()[0].replace('-lossless', '') for line in file if line.strip()]
+
+# time the current thread spent inside subprocess.run
+timing = threading.local()
+timing_lock = threading.Lock()
+stage_times = {} # stage -> [items, wall time, subprocess time]
+real_run = subprocess.run
+
+def timed_run(*a, **b):
+    start = time.time()
+    try:
+        return real_run(*a, **b)
+    finally:
+        timing.subprocess_time = getattr(timing, 'subprocess_time', 0) + time.time() - start
+
+def timed_stage(stage, function):
+    # wraps one of main.py's per-item functions, so idle workers waiting
+    # on the queue never count towards the overhead
+    def timed_function(*a, **b):
+        subprocess_before = getattr(timing, 'subprocess_time', 0)
+        start = time.time()
+        try:
+            return function(*a, **b)
+        finally:
+            wall_time = time.time() - start
+            subprocess_time = getattr(timing, 'subprocess_time', 0) - subprocess_before
+            with timing_lock:
+                times = stage_times.setdefault(stage, [0, 0, 0])
+                times[0] += 1
+                times[1] += wall_time
+                times[2] += subprocess_time
+
+    return timed_function
+
+def install_timing():
+    subprocess.run = timed_run
+
+    # before and after sizes plus finding the items to convert
+    converter.get_size = timed_stage('scan', converter.get_size)
+    converter.get_image_dirs = timed_stage('scan', converter.get_image_dirs)
+
+    converter.process_one = timed_stage('encode', converter.process_one)
+
+    # the verifier pool, decodes and deferred deletes overlap with the encodes above
+    converter.verify_conversion = timed_stage('verify', converter.verify_conversion)
+    converter.finish_conversion = timed_stage('verify', converter.finish_conversion)
+
+def get_overhead(stage):
+    # time per image spent in main.py itself rather than waiting on encoders
+    items, wall_time, subprocess_time = stage_times.get(stage, [0, 0, 0])
+    return (wall_time - subprocess_time) / item_count
+
+def get_wall_time(stage):
+    # du is main.py's own scanning, so its subprocess time counts here
+    items, wall_time, subprocess_time = stage_times.get(stage, [0, 0, 0])
+    return wall_time / item_count
+
+def get_subprocess_time(stage):
+    items, wall_time, subprocess_time = stage_times.get(stage, [0, 0, 0])
+    return subprocess_time / item_count
+
+def reset_converter(library_dir, log_dir, workers):
+    converter.source_dir = library_dir
+    converter.log_dir = log_dir + os.sep
+    converter.worker_count = workers
+    converter.conversion_log = ''
+    converter.jxl_fight_count = 0
+    converter.jxl_lossless_win_count = 0
+    converter.outcomes = dict.fromkeys(converter.outcomes, 0)
+
+def run_once(template_dir, work_dir, bin_dir, log_path, workers):
+    library_dir = os.path.join(work_dir, f'library_w{workers}')
+    shutil.copytree(template_dir, library_dir)
+    reset_converter(library_dir, work_dir, workers)
+    stage_times.clear()
+
+    # safe_print goes through sys.stdout, keep the terminal for the results
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter.main()
+    elapsed = time.time() - start
+
+    # the index is warm now, this is what the nightly run over an unchanged library costs
+    rescan = timed_stage('rescan', converter.get_image_dirs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        rescan()
+    if converter.index_conn != None:
+        converter.index_conn.close()
+
+    invocations = read_stub_log(log_path)
+    os.remove(log_path)
+    if not keep_library:
+        shutil.rmtree(library_dir)
+
+    return elapsed, invocations, dict(converter.outcomes)
+
+def run_node(index):
+    converter.node_id = f'bench-node-{index:02d}'
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter.main()
+
+def run_sharded(template_dir, work_dir, log_path, nodes):
+    library_dir = os.path.join(work_dir, f'library_n{nodes}')
+    shutil.copytree(template_dir, library_dir)
+    reset_converter(library_dir, work_dir, shard_worker_count)
+    converter.shard_run_id = f'bench-n{nodes}'
+    converter.index_path = os.path.join(work_dir, f'index_n{nodes}.sqlite')
+
+    # forked, so every node starts from the configuration set above
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=run_node, args=[i]) for i in range(nodes)]
+
+    start = time.time()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.time() - start
+
+    converter.shard_run_id = None
+    converter.index_path = None
+    run_dir = os.path.join(library_lease.get_shard_dir(library_dir), f'bench-n{nodes}')
+    reports = library_lease.read_node_reports(run_dir)
+    processed = [sum(a['outcomes'].values()) for a in reports]
+
+    os.remove(log_path)
+    if not keep_library:
+        shutil.rmtree(library_dir)
+        shutil.rmtree(library_lease.get_shard_dir(library_dir))
+
+    return elapsed, processed
+
+def get_result_text(workers, elapsed, invocations, overhead, baseline):
+    files_per_second = item_count / elapsed
+    scaling = baseline / elapsed
+    verify_overhead = get_overhead('verify')
+    decode_time = get_subprocess_time('verify')
+
+    scan_time = get_wall_time('scan')
+    rescan_time = get_wall_time('rescan')
+
+    return f'{workers:>7} {elapsed:>9.2f}s {files_per_second:>9.2f} ' \
+        f'{len(invocations) / item_count:>9.2f} {overhead * 1000:>11.2f}ms ' \
+        f'{verify_overhead * 1000:>9.2f}ms {decode_time * 1000:>9.2f}ms ' \
+        f'{scan_time * 1000:>9.2f}ms {rescan_time * 1000:>9.2f}ms {scaling:>7.2f}x'
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='library-compressor-bench-')
+    bin_dir = os.path.join(work_dir, 'bin')
+    template_dir = os.path.join(work_dir, 'template')
+    log_path = os.path.join(work_dir, 'stub.log')
+    os.mkdir(bin_dir)
+    os.mkdir(template_dir)
+
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ['PATH']
+
+    print(f'building {item_count} items in {work_dir}\n')
+    make_library(template_dir, item_count)
+    make_stubs(bin_dir, log_path)
+
+    install_timing()
+
+    print(f'{"workers":>7} {"elapsed":>10} {"files/s":>9} {"calls/img":>9} {"overhead/img":>13} {"verify/img":>11} {"decode/img":>11} {"scan/img":>11} {"rescan/img":>11} {"scaling":>8}')
+    baseline = None
+    gated_overhead = None
+    gated_scan = None
+    for workers in worker_counts:
+        elapsed, invocations, outcomes = run_once(template_dir, work_dir, bin_dir, log_path, workers)
+        overhead = get_overhead('encode')
+        if baseline == None:
+            baseline = elapsed
+            gated_overhead = overhead
+            gated_scan = get_wall_time('scan')
+
+        print(get_result_text(workers, elapsed, invocations, overhead, baseline))
+
+    converted_count = sum([outcomes[a] for a in converter.success_outcomes])
+    print(f'\nlast run converted {converted_count} files out of {item_count}')
+
+    if shard_node_counts:
+        print(f'\n{"nodes":>7} {"elapsed":>10} {"files/s":>9} {"scaling":>8}  per node (w{shard_worker_count})')
+
+    for nodes in shard_node_counts:
+        elapsed, processed = run_sharded(template_dir, work_dir, log_path, nodes)
+        per_node = ', '.join([str(a) for a in processed])
+        print(f'{nodes:>7} {elapsed:>9.2f}s {item_count / elapsed:>9.2f} {baseline / elapsed:>7.2f}x  {per_node}')
+
+        if sum(processed) != item_count:
+            print(f'{sum(processed)} items processed across {nodes} nodes, expected {item_count}')
+            sys.exit(1)
+
+    if keep_library:
+        print(f'kept {work_dir}')
+    else:
+        shutil.rmtree(work_dir)
+
+    if max_overhead_per_image != None and gated_overhead > max_overhead_per_image:
+        print(f'overhead {gated_overhead * 1000:.2f}ms/img exceeds {max_overhead_per_image * 1000:.2f}ms/img')
+        sys.exit(1)
+
+    if max_scan_per_image != None and gated_scan > max_scan_per_image:
+        print(f'scan {gated_scan * 1000:.2f}ms/img exceeds {max_scan_per_image * 1000:.2f}ms/img')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,8 @@ import time
 import random
 import string
 
+import library_index
+
 source_dir = '/Volumes/Athena/river-lib/huge_png_lib'
 output_dir = '/Volumes/Athena/river-lib/compare_output'
 
@@ -15,6 +17,9 @@ image_count = 40
 iteration_count = 2
 encoder_thread_count = None
 
+use_library_index = True
+index_path = None # defaults to <source_dir>.index.sqlite
+
 converted_extensions = ['avif', 'jxl', 'webp']
 valid_extensions = ['png', 'jpg', 'jpeg', 'gif']
 
@@ -115,8 +120,19 @@ def safe_print(*a, **b):
     with print_lock:
         print(*a, **b)
 
+def get_image_dirs():
+    if not use_library_index:
+        return [f.path for f in os.scandir(source_dir) if f.is_dir()]
+
+    conn = library_index.open_index(source_dir, index_path)
+    library_index.refresh(conn, source_dir)
+    image_dirs = library_index.get_convertible_dirs(conn, valid_extensions)
+    conn.close()
+
+    return image_dirs
+
 def main():
-    image_dirs = [f.path for f in os.scandir(source_dir) if f.is_dir()]
+    image_dirs = get_image_dirs()
 
     converted_images = 0
     while converted_images < image_count:
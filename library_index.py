@@ -0,0 +1,198 @@
+import os
+import json
+import sqlite3
+import threading
+
+# persistent index of a library's item dirs so runs only revisit what changed.
+# an item dir's mtime changes whenever a file inside it is added, removed or renamed,
+# which covers ingestion, conversion (original removed, winner renamed in) and purges.
+# in place edits of metadata.json don't touch the dir mtime, so whoever rewrites
+# metadata should call update_item afterwards (main.py does)
+
+# one connection is shared between worker threads
+index_lock = threading.Lock()
+
+schema = '''
+create table if not exists items (
+    dir_path text primary key,
+    dir_mtime integer not null,
+    has_metadata integer not null,
+    ext text,
+    name text,
+    size integer,
+    has_image integer not null,
+    outcome text
+)
+'''
+
+upsert_query = '''
+insert into items (dir_path, dir_mtime, has_metadata, ext, name, size, has_image, outcome)
+values (?, ?, ?, ?, ?, ?, ?, ?)
+on conflict (dir_path) do update set
+    dir_mtime = excluded.dir_mtime,
+    has_metadata = excluded.has_metadata,
+    ext = excluded.ext,
+    name = excluded.name,
+    size = excluded.size,
+    has_image = excluded.has_image,
+    outcome = excluded.outcome
+'''
+
+# refresh's version of the upsert, only lands if the row still has the mtime refresh read
+# before scanning, so a worker's update_item in the meantime isn't overwritten with stale state
+refresh_query = upsert_query + '''where items.dir_mtime is ?
+'''
+
+def get_index_path(library_dir):
+    # next to the library rather than inside it, so it never looks like an item dir
+    # and doesn't count towards the library's size
+    return os.path.normpath(library_dir) + '.index.sqlite'
+
+def get_local_index_path(library_dir):
+    # for nodes sharing a library over the network, sqlite's locking isn't
+    # reliable there so each node keeps its own index on local disk
+    cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'library-compressor')
+    os.makedirs(cache_dir, exist_ok=True)
+
+    name = os.path.abspath(library_dir).strip(os.sep).replace(os.sep, '_')
+    return os.path.join(cache_dir, f'{name}.index.sqlite')
+
+def open_index(library_dir, index_path=None):
+    if index_path == None:
+        index_path = get_index_path(library_dir)
+
+    conn = sqlite3.connect(index_path, check_same_thread=False)
+    with index_lock:
+        conn.execute(schema)
+        conn.commit()
+
+    return conn
+
+def read_item(dir_path):
+    # [has_metadata, ext, name, size, has_image]
+    files = [f.name for f in os.scandir(dir_path) if not f.is_dir()]
+    if 'metadata.json' not in files:
+        return [False, None, None, None, False]
+
+    try:
+        with open(os.path.join(dir_path, 'metadata.json'), 'r') as file:
+            metadata = json.load(file)
+
+        ext = metadata['ext']
+        name = metadata['name']
+    except (OSError, ValueError, KeyError, TypeError):
+        # still being written, broken or gone, either way not usable yet
+        return [False, None, None, None, False]
+
+    has_image = f'{name}.{ext}' in files
+    return [True, ext, name, metadata.get('size'), has_image]
+
+def get_stored_mtime(mtime, item):
+    # metadata.json written in place doesn't bump the dir mtime, so items
+    # without usable metadata are stored as never seen and re-read every refresh
+    return mtime if item[0] else 0
+
+def refresh(conn, library_dir):
+    # stats every item dir but only reads the ones whose mtime changed,
+    # returns the paths of new or changed item dirs
+    with index_lock:
+        known = dict(conn.execute('select dir_path, dir_mtime from items'))
+
+    changed = []
+    present = set()
+    for entry in os.scandir(library_dir):
+        if not entry.is_dir():
+            continue
+
+        try:
+            mtime = entry.stat().st_mtime_ns
+            if known.get(entry.path) == mtime:
+                present.add(entry.path)
+                continue
+
+            item = read_item(entry.path)
+        except FileNotFoundError:
+            # purged (e.g. by sanitize.py) since the scandir listed it, so it counts as removed
+            continue
+
+        # the item changed behind our back, so any recorded outcome is stale
+        present.add(entry.path)
+        changed.append([entry.path, get_stored_mtime(mtime, item)] + item + [None, known.get(entry.path)])
+
+    removed = [[a] for a in known if a not in present]
+
+    with index_lock:
+        conn.executemany(refresh_query, changed)
+        conn.executemany('delete from items where dir_path = ?', removed)
+        conn.commit()
+
+    return [a[0] for a in changed]
+
+def update_item(conn, dir_path, outcome=None):
+    # re-reads a single item dir after we touched it ourselves
+    if not os.path.isdir(dir_path):
+        remove_item(conn, dir_path)
+        return
+
+    try:
+        mtime = os.stat(dir_path).st_mtime_ns
+        item = read_item(dir_path)
+    except FileNotFoundError:
+        # removed while we were reading it
+        remove_item(conn, dir_path)
+        return
+
+    row = [dir_path, get_stored_mtime(mtime, item)] + item + [outcome]
+
+    with index_lock:
+        conn.execute(upsert_query, row)
+        conn.commit()
+
+def remove_item(conn, dir_path):
+    with index_lock:
+        conn.execute('delete from items where dir_path = ?', [dir_path])
+        conn.commit()
+
+def get_outcome(conn, dir_path, dir_mtime):
+    # the recorded outcome, but only while the item dir is as it was when it was recorded
+    with index_lock:
+        row = conn.execute('select dir_mtime, outcome from items where dir_path = ?', [dir_path]).fetchone()
+
+    if row == None or row[0] != dir_mtime:
+        return None
+
+    return row[1]
+
+def get_convertible_dirs(conn, valid_extensions, skipped_outcomes=[]):
+    # item dirs with metadata and an image in one of the valid extensions,
+    # minus the ones whose last outcome is in skipped_outcomes
+    ext_marks = ', '.join('?' * len(valid_extensions))
+    outcome_marks = ', '.join('?' * len(skipped_outcomes))
+    query = 'select dir_path from items where has_metadata = 1 and has_image = 1 ' \
+        f'and ext in ({ext_marks}) and (outcome is null or outcome not in ({outcome_marks})) ' \
+        'order by dir_path'
+
+    with index_lock:
+        rows = conn.execute(query, list(valid_extensions) + list(skipped_outcomes)).fetchall()
+
+    return [a[0] for a in rows]
+
+def get_bad_dirs(conn, valid_extensions):
+    # item dirs without metadata, without their image or with an extension outside valid_extensions
+    ext_marks = ', '.join('?' * len(valid_extensions))
+    query = 'select dir_path from items where has_metadata = 0 or has_image = 0 ' \
+        f'or ext not in ({ext_marks}) order by dir_path'
+
+    with index_lock:
+        rows = conn.execute(query, list(valid_extensions)).fetchall()
+
+    return [a[0] for a in rows]
+
+def get_incomplete_dirs(conn):
+    # item dirs missing their metadata or their image
+    query = 'select dir_path from items where has_metadata = 0 or has_image = 0 order by dir_path'
+
+    with index_lock:
+        rows = conn.execute(query).fetchall()
+
+    return [a[0] for a in rows]
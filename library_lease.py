@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import socket
+import threading
+
+# lets several processes, on one host or on several mounting the same library,
+# split a run by claiming item dirs through lease files.
+# creating a file with O_CREAT | O_EXCL is atomic on local filesystems, nfs and smb,
+# which is more than sqlite's locking promises on a network volume.
+#
+# <run_dir>/leases/<item>  held by a node, its mtime is the heartbeat
+# <run_dir>/leases/<item>.break-<mtime>  taken by the one node breaking that expired lease,
+#                                         .break-<mtime>.<n> if the node before it died mid break
+# <run_dir>/done/<item>    finished this run, never claimed again
+# <run_dir>/nodes/<node>.json  each node's counters and log for the merged report
+#
+# lease expiry compares file mtimes against the local clock, so keep the lease time
+# well above the clock skew between hosts
+
+# leases this process holds, kept alive by the heartbeat thread
+held_leases = set()
+lease_lock = threading.Lock()
+
+# a breaker only lives for the few file operations of a break, one older than this
+# was left by a node that died halfway through
+breaker_timeout = 30.0
+
+def get_node_id():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+def get_shard_dir(library_dir):
+    return os.path.normpath(library_dir) + '.shards'
+
+def open_run(shard_dir, run_id):
+    run_dir = os.path.join(shard_dir, run_id)
+    for sub_dir in ['leases', 'done', 'nodes']:
+        os.makedirs(os.path.join(run_dir, sub_dir), exist_ok=True)
+
+    return run_dir
+
+def get_lease_path(run_dir, image_dir):
+    return os.path.join(run_dir, 'leases', os.path.basename(image_dir))
+
+def get_done_path(run_dir, image_dir):
+    return os.path.join(run_dir, 'done', os.path.basename(image_dir))
+
+def read_lease(lease_path):
+    # [mtime_ns, owner node id], raises FileNotFoundError if it's gone
+    with open(lease_path, 'r') as file:
+        owner = file.read()
+        mtime = os.fstat(file.fileno()).st_mtime_ns
+
+    return [mtime, owner]
+
+def create_breaker(lease_path, lease):
+    # returns the breaker path if we're the one breaking this lease, None otherwise
+    generation = 0
+    while True:
+        breaker_path = f'{lease_path}.break-{lease[0]}'
+        if generation > 0:
+            breaker_path += f'.{generation}'
+
+        try:
+            fd = os.open(breaker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return breaker_path
+        except FileExistsError:
+            pass
+
+        try:
+            if time.time() - os.stat(breaker_path).st_mtime < breaker_timeout:
+                return None
+        except FileNotFoundError:
+            # that break just finished
+            return None
+
+        # stale breakers are left in place rather than removed, two nodes that both
+        # find one stale would otherwise remove each other's fresh breaker
+        generation += 1
+
+def reclaim_expired(lease_path, lease_time):
+    # returns True if the lease is gone and claiming can be retried
+    try:
+        lease = read_lease(lease_path)
+        if time.time() - lease[0] / 1e9 < lease_time:
+            return False
+
+        # each expired lease gets one breaker named after its mtime, so only one node
+        # breaks it. a node that read the same lease late either fails to create the
+        # breaker or, once the breaker is gone, finds a different lease and leaves it alone
+        breaker_path = create_breaker(lease_path, lease)
+        if breaker_path == None:
+            return False
+
+        try:
+            if read_lease(lease_path) == lease:
+                os.remove(lease_path)
+        finally:
+            os.remove(breaker_path)
+    except FileNotFoundError:
+        # released or reclaimed by someone else in the meantime
+        pass
+
+    return True
+
+def is_owner(lease_path, node_id):
+    try:
+        return read_lease(lease_path)[1] == node_id
+    except FileNotFoundError:
+        return False
+
+def is_done(run_dir, image_dir):
+    return os.path.exists(get_done_path(run_dir, image_dir))
+
+def claim(run_dir, image_dir, node_id, lease_time):
+    done_path = get_done_path(run_dir, image_dir)
+    if os.path.exists(done_path):
+        return False
+
+    lease_path = get_lease_path(run_dir, image_dir)
+    for attempt in range(2):
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not reclaim_expired(lease_path, lease_time):
+                return False
+            continue
+
+        with os.fdopen(fd, 'w') as file:
+            file.write(node_id)
+
+        # it may have been finished between the done check and the create
+        if os.path.exists(done_path):
+            os.remove(lease_path)
+            return False
+
+        with lease_lock:
+            held_leases.add(lease_path)
+        return True
+
+    return False
+
+def complete(run_dir, image_dir, node_id):
+    lease_path = get_lease_path(run_dir, image_dir)
+    with open(get_done_path(run_dir, image_dir), 'w') as file:
+        pass
+
+    with lease_lock:
+        held_leases.discard(lease_path)
+
+    # if we were too slow and it got reclaimed, the lease isn't ours to remove
+    if is_owner(lease_path, node_id):
+        os.remove(lease_path)
+
+def heartbeat(lease_time, node_id):
+    while True:
+        time.sleep(lease_time / 3)
+        with lease_lock:
+            lease_paths = list(held_leases)
+
+        for lease_path in lease_paths:
+            try:
+                if is_owner(lease_path, node_id):
+                    os.utime(lease_path)
+                    continue
+            except FileNotFoundError:
+                pass
+
+            # reclaimed by another node after all, nothing to keep alive
+            with lease_lock:
+                held_leases.discard(lease_path)
+
+def start_heartbeat(lease_time, node_id):
+    heartbeatThread = threading.Thread(target=heartbeat, args=[lease_time, node_id], daemon=True)
+    heartbeatThread.start()
+
+def write_node_report(run_dir, node_id, report):
+    # written under a temporary name so readers never see half a report
+    report_path = os.path.join(run_dir, 'nodes', f'{node_id}.json')
+    temp_path = f'{report_path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(report, file)
+
+    os.replace(temp_path, report_path)
+
+def read_node_reports(run_dir):
+    nodes_dir = os.path.join(run_dir, 'nodes')
+    reports = []
+    for entry in sorted(os.scandir(nodes_dir), key=lambda a: a.name):
+        if not entry.name.endswith('.json'):
+            continue
+
+        with open(entry.path, 'r') as file:
+            reports.append(json.load(file))
+
+    return reports
@@ -0,0 +1,70 @@
+import os
+import sys
+import ctypes
+import ctypes.util
+import select
+import struct
+
+# minimal inotify binding over libc, linux only.
+# open_inotify returns None anywhere it isn't available (macos, old kernels,
+# exhausted instances) and callers fall back to polling
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+event_header = struct.Struct('iIII') # wd, mask, cookie, len
+read_size = 64 * 1024
+
+libc = None
+
+def open_inotify():
+    global libc
+
+    if not sys.platform.startswith('linux'):
+        return None
+
+    if libc == None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            libc.inotify_init1
+        except (OSError, AttributeError):
+            libc = None
+            return None
+
+    fd = libc.inotify_init1(IN_CLOEXEC)
+    return fd if fd >= 0 else None
+
+def add_watch(fd, path, mask):
+    # returns the watch descriptor, or -1 if the path is gone or we're out of watches
+    return libc.inotify_add_watch(fd, os.fsencode(path), ctypes.c_uint32(mask))
+
+def rm_watch(fd, wd):
+    libc.inotify_rm_watch(fd, wd)
+
+def read_events(fd, timeout):
+    # blocks for at most timeout seconds, returns [[wd, mask, name], ...]
+    readable, _, _ = select.select([fd], [], [], timeout)
+    if not readable:
+        return []
+
+    data = os.read(fd, read_size)
+    events = []
+    offset = 0
+    while offset < len(data):
+        wd, mask, cookie, length = event_header.unpack_from(data, offset)
+        offset += event_header.size
+
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+
+        events.append([wd, mask, os.fsdecode(name)])
+
+    return events
@@ -1,10 +1,18 @@
 import os
 import json
+import struct
+import filecmp
+import tempfile
 import subprocess
 from pathlib import Path
 import threading
 import queue
 import time
+import random
+
+import library_index
+import library_watch
+import library_lease
 
 source_dir = '/Volumes/Athena/river-lib/medium_jpg_lib_test'
 
@@ -30,16 +38,72 @@ worker_count = 8
 encoder_thread_count = None
 # optimal for jxl: w8 e4
 
+# --- verification ---
+
+# decode every winner before the original is deleted and metadata rewritten,
+# lossless jpg transcodes must reconstruct the original byte for byte.
+# runs in its own pool so it overlaps with the next images' encodes
+verify_enabled = True
+verify_worker_count = 4
+verify_queue_size = 16 # encoder workers block when this many items await verification
+verify_queue = None
+
 # --- extensions ---
 
 converted_extensions = ['avif', 'jxl', 'webp']
 valid_extensions = ['png', 'jpg', 'jpeg', 'gif']
 
+# --- library index ---
+
+use_library_index = True
+index_path = None # defaults to <source_dir>.index.sqlite, or a node-local one when sharding
+index_conn = None
+
+# items whose last outcome was one of these aren't retried,
+# set to [] after changing the conversion parameters or installing a missing djxl/avifdec
+index_skipped_outcomes = ['compression-fail', 'threshold-fail', 'verification-fail']
+
+# --- daemon ---
+
+# watch source_dir and convert items as they're ingested instead of running one batch
+daemon_mode = False
+daemon_worker_count = 2
+daemon_settle_time = 2.0 # seconds an item's files must stay untouched before converting
+# seconds between index refreshes. the only source of changes when inotify isn't available (macos),
+# and needed with it too: inotify on an nfs/smb mount never reports files created by other hosts
+daemon_poll_interval = 30.0
+daemon_pending_timeout = 3600.0 # seconds to wait for an item to get both metadata and image
+
+daemon_root_mask = library_watch.IN_CREATE | library_watch.IN_MOVED_TO | library_watch.IN_ONLYDIR
+daemon_item_mask = library_watch.IN_CREATE | library_watch.IN_MOVED_TO | \
+    library_watch.IN_MODIFY | library_watch.IN_CLOSE_WRITE | library_watch.IN_ONLYDIR
+
+# item dirs sitting in the queue or being processed
+queued_dirs = set()
+daemon_enqueued_count = 0
+
+# --- sharding ---
+
+# several main.py processes, on this host or on others mounting the same library,
+# split one run by claiming item dirs through lease files in <shard_dir>/<shard_run_id>
+shard_run_id = None # same on every node, e.g. 'nightly-2026-10-19', None to run alone
+shard_dir = None # defaults to <source_dir>.shards
+shard_lease_time = 600.0 # seconds without a heartbeat before a dead node's items are reclaimed
+shard_retry_interval = 10.0 # seconds between retries of items other nodes were holding
+shard_give_up_time = 3600.0 # seconds to keep retrying held items before leaving them to whoever holds them
+node_id = library_lease.get_node_id()
+run_dir = None
+
+# items other nodes held a lease on when we got to them, [index, image_dir]
+lease_held_dirs = []
+
 # --- locks ---
 
 print_log_lock = threading.Lock()
 jxl_win_count_lock = threading.Lock()
 outcome_lock = threading.Lock()
+queued_lock = threading.Lock()
+lease_held_lock = threading.Lock()
 
 # --- counters ---
 
@@ -67,7 +131,8 @@ outcomes = {
     'conversion-error': 0,
     'threshold-fail': 0,
     'no-metadata': 0,
-    'no-image': 0
+    'no-image': 0,
+    'verification-fail': 0
 }
 
 success_outcomes = [
@@ -94,7 +159,7 @@ def get_outcome_text(outcomes):
     result += f'Total: {outcome_count}\n\n'
 
     for outcome, count in outcomes.items():
-        ratio = count / outcome_count
+        ratio = count / outcome_count if outcome_count != 0 else 0
         outcome_str = f'{outcome}:'
         result += f'{outcome_str:<23} {count:>6} {ratio:>8.2%}\n'
 
@@ -416,7 +481,6 @@ def convert_to_best(path, name):
         os.remove(winner_path)
         return 'compression_fail'
 
-    os.remove(path)
     return [winner_path, winner, old_size, winner_size, winner_type]
 
 def process_one(dir_path, index, total_count, name):
@@ -462,8 +526,92 @@ def process_one(dir_path, index, total_count, name):
             safe_print(f'[{name}] everyone failed the threshold or errored, skipping')
             return 'threshold-fail'
 
+    if verify_enabled:
+        # the verifier finishes the conversion and records the outcome
+        verify_queue.put([dir_path, path, metadata_file, metadata, result, index, total_count, name])
+        return None
+
+    return finish_conversion(path, metadata_file, metadata, result, index, total_count, name)
+
+def get_dimensions(path):
+    # [width, height] from the png/gif/jpg header, None if it can't be read
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(24)
+            if header[:8] == b'\x89PNG\r\n\x1a\n':
+                return list(struct.unpack('>II', header[16:24]))
+
+            if header[:6] in [b'GIF87a', b'GIF89a']:
+                return list(struct.unpack('<HH', header[6:10]))
+
+            if header[:2] != b'\xff\xd8':
+                return None
+
+            file.seek(2)
+            while True:
+                marker = file.read(2)
+                if marker[0] != 0xff:
+                    return None
+
+                kind = marker[1]
+                if kind == 0xff:
+                    # fill byte
+                    file.seek(-1, 1)
+                    continue
+
+                if kind == 0x01 or 0xd0 <= kind <= 0xd7:
+                    continue
+
+                length = struct.unpack('>H', file.read(2))[0]
+                if 0xc0 <= kind <= 0xcf and kind not in [0xc4, 0xc8, 0xcc]:
+                    height, width = struct.unpack('>xHH', file.read(5))
+                    return [width, height]
+
+                file.seek(length - 2, 1)
+    except (OSError, IndexError, struct.error):
+        return None
+
+def verify_conversion(path, new_path, winner_type):
+    # returns what's wrong with the converted image, None if it's fine
+    new_path = Path(new_path)
+    decoder = 'djxl' if new_path.suffix == '.jxl' else 'avifdec'
+
+    # djxl reconstructs the original jpg when asked for one from a lossless transcode
+    reconstruct = winner_type.startswith('jxl-lossless')
+    decoded_suffix = Path(path).suffix if reconstruct else '.png'
+
+    with tempfile.TemporaryDirectory(prefix='library-compressor-') as temp_dir:
+        decoded_path = os.path.join(temp_dir, f'decoded{decoded_suffix}')
+
+        args = [decoder, new_path, decoded_path]
+        try:
+            decode_result = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as error:
+            # not installed or not runnable, an unverified winner is no better than a broken one
+            return f'{decoder} failed to run ({error})'
+
+        if decode_result.returncode != 0 or not os.path.isfile(decoded_path):
+            return f'{decoder} failed'
+
+        if reconstruct:
+            if not filecmp.cmp(path, decoded_path, shallow=False):
+                return 'reconstructed jpg differs from the original'
+            return None
+
+        # decoders apply the exif orientation cjxl/avifenc carried over, so for
+        # orientations 5-8 the decoded image is the original transposed
+        old_dimensions = get_dimensions(path)
+        new_dimensions = get_dimensions(decoded_path)
+        if old_dimensions != None and old_dimensions != new_dimensions and old_dimensions[::-1] != new_dimensions:
+            return f'dimensions changed from {old_dimensions} to {new_dimensions}'
+
+    return None
+
+def finish_conversion(path, metadata_file, metadata, result, index, total_count, name):
     new_path, img_format, old_size, new_size, winner_type = result
 
+    os.remove(path)
+
     metadata['ext'] = img_format
     metadata['size'] = new_size
     with open(metadata_file, 'w') as file:
@@ -471,32 +619,106 @@ def process_one(dir_path, index, total_count, name):
 
     reduction = (1 - (new_size / old_size)) * -100
     index += 1
-    progress = (index / total_count) * 100
     readable_old_size = human_size(old_size, False)
     readable_new_size = human_size(new_size, False)
 
+    # the daemon doesn't know the total
+    progress_text = f'#{index}'
+    if total_count != None:
+        progress = (index / total_count) * 100
+        progress_text = f'{index}/{total_count} {progress:.2f}%'
+
     to_print = f"[{name}] done.\t" \
     f"old: {readable_old_size},\t" \
     f"new: {readable_new_size},\t" \
     f"r: {reduction:.2f}%,\t" \
-    f"{index}/{total_count} {progress:.2f}%"
+    f"{progress_text}"
     safe_print(to_print)
 
     return winner_type
 
+def record_outcome(image_dir, outcome):
+    with outcome_lock:
+        outcomes[outcome] += 1
+
+    if index_conn != None:
+        library_index.update_item(index_conn, image_dir, outcome)
+
+    with queued_lock:
+        queued_dirs.discard(image_dir)
+
+    if run_dir != None:
+        library_lease.complete(run_dir, image_dir, node_id)
+
+def record_error(image_dir, name, error):
+    # a worker that dies takes the daemon's pool and q.join() down with it,
+    # so anything unexpected (e.g. the item dir vanishing mid-conversion) only fails the item
+    safe_print(f'[{name}] {image_dir} failed with {error!r}, skipping')
+    record_outcome(image_dir, 'conversion-error')
+
 def work(name, queue, total_count):
     while True:
         index, image_dir = queue.get()
 
-        outcome = process_one(image_dir, index, total_count, name)
-        with outcome_lock:
-            outcomes[outcome] += 1
+        try:
+            if run_dir != None and not library_lease.claim(run_dir, image_dir, node_id, shard_lease_time):
+                # another node already did it or has it, those are retried after the main pass
+                if not library_lease.is_done(run_dir, image_dir):
+                    with lease_held_lock:
+                        lease_held_dirs.append([index, image_dir])
+                continue
+
+            # None means it was handed over to the verifier
+            outcome = process_one(image_dir, index, total_count, name)
+            if outcome != None:
+                record_outcome(image_dir, outcome)
+        except Exception as error:
+            record_error(image_dir, name, error)
+        finally:
+            queue.task_done()
+
+def verify_work(queue):
+    while True:
+        image_dir, path, metadata_file, metadata, result, index, total_count, name = queue.get()
+        new_path, img_format, old_size, new_size, winner_type = result
+
+        try:
+            problem = verify_conversion(path, new_path, winner_type)
+            if problem == None:
+                outcome = finish_conversion(path, metadata_file, metadata, result, index, total_count, name)
+            else:
+                safe_print(f'[{name}] verification failed, {problem}, keeping the original')
+                os.remove(new_path)
+                outcome = 'verification-fail'
+
+            record_outcome(image_dir, outcome)
+        except Exception as error:
+            # drop the unverified winner, unless the original is already gone and it's all that's left
+            if os.path.exists(path) and os.path.exists(new_path):
+                os.remove(new_path)
+            record_error(image_dir, name, error)
+        finally:
+            queue.task_done()
+
+def start_verifiers():
+    global verify_queue
+
+    if not verify_enabled:
+        return
 
-        queue.task_done()
+    verify_queue = queue.Queue(maxsize=verify_queue_size)
+    for i in range(verify_worker_count):
+        verifierThread = threading.Thread(target=verify_work, args=[verify_queue], daemon=True)
+        verifierThread.start()
+
+def wait_for_verifiers():
+    if verify_enabled:
+        verify_queue.join()
 
 def start_work(image_dirs):
     q = queue.Queue()
     total_count = len(image_dirs)
+    start_verifiers()
 
     workers = []
     for i in range(worker_count):
@@ -504,17 +726,310 @@ def start_work(image_dirs):
         workers.append(workerThread)
         workerThread.start()
 
+    lease_held_dirs.clear()
     for index, image_dir in enumerate(image_dirs):
         q.put([index, image_dir])
 
     q.join()
+    if run_dir != None:
+        retry_lease_held(q)
+
+    wait_for_verifiers()
     safe_print('\nall work completed')
 
+def retry_lease_held(q):
+    # a dead node's leases only expire after shard_lease_time, by which point every
+    # other node has usually walked past its items, so keep retrying them until done
+    started = time.time()
+    while True:
+        with lease_held_lock:
+            held = lease_held_dirs[:]
+            lease_held_dirs.clear()
+
+        held = [a for a in held if not library_lease.is_done(run_dir, a[1])]
+        if held:
+            safe_print(f'waiting on {len(held)} items leased by other nodes')
+
+        # live nodes usually finish theirs well before the next retry
+        deadline = time.time() + shard_retry_interval
+        while held and time.time() < deadline:
+            time.sleep(min(1.0, shard_retry_interval))
+            held = [a for a in held if not library_lease.is_done(run_dir, a[1])]
+
+        if not held:
+            return
+
+        if time.time() - started >= shard_give_up_time:
+            safe_print(f'giving up on {len(held)} items still leased by other nodes')
+            for item in held:
+                safe_print(f'[lease] {item[1]} still leased, not processed by this node')
+            return
+
+        for item in held:
+            q.put(item)
+        q.join()
+
+def get_image_dirs():
+    global index_conn
+
+    if not use_library_index:
+        return [f.path for f in os.scandir(source_dir) if f.is_dir()]
+
+    path = index_path
+    if path == None and shard_run_id != None:
+        path = library_index.get_local_index_path(source_dir)
+
+    index_conn = library_index.open_index(source_dir, path)
+    changed = library_index.refresh(index_conn, source_dir)
+    image_dirs = library_index.get_convertible_dirs(index_conn, valid_extensions, index_skipped_outcomes)
+    safe_print(f'index refreshed, {len(changed)} items changed, {len(image_dirs)} to convert')
+
+    return image_dirs
+
+def get_item_state(dir_path):
+    # 'ready' once metadata.json and its image exist and have been left alone for daemon_settle_time,
+    # 'skip' for items process_one would only skip or that already ended in index_skipped_outcomes,
+    # 'waiting' otherwise
+    metadata_path = os.path.join(dir_path, 'metadata.json')
+    try:
+        with open(metadata_path, 'r') as file:
+            metadata = json.load(file)
+
+        image_path = os.path.join(dir_path, metadata['name'] + '.' + metadata['ext'])
+        mtimes = [os.path.getmtime(dir_path), os.path.getmtime(metadata_path), os.path.getmtime(image_path)]
+        dir_mtime = os.stat(dir_path).st_mtime_ns
+    except (OSError, ValueError, KeyError, TypeError):
+        # not there yet or still being written
+        return 'waiting' if os.path.isdir(dir_path) else 'skip'
+
+    if metadata['ext'] not in valid_extensions:
+        return 'skip'
+
+    # in place metadata edits don't change the dir, a new image does and gets it retried
+    if library_index.get_outcome(index_conn, dir_path, dir_mtime) in index_skipped_outcomes:
+        return 'skip'
+
+    if time.time() - max(mtimes) < daemon_settle_time:
+        return 'waiting'
+
+    return 'ready'
+
+def enqueue_item(q, image_dir):
+    global daemon_enqueued_count
+
+    with queued_lock:
+        if image_dir in queued_dirs:
+            return
+
+        queued_dirs.add(image_dir)
+        index = daemon_enqueued_count
+        daemon_enqueued_count += 1
+
+    q.put([index, image_dir])
+
+def flush_log(log_path):
+    global conversion_log
+
+    with print_log_lock:
+        if conversion_log == '':
+            return
+
+        with open(log_path, 'a') as file:
+            file.write(conversion_log)
+        conversion_log = ''
+
+def watch_item(inotify_fd, image_dir, watched, item_wds):
+    if inotify_fd == None or image_dir in item_wds:
+        return
+
+    wd = library_watch.add_watch(inotify_fd, image_dir, daemon_item_mask)
+    if wd >= 0:
+        watched[wd] = image_dir
+        item_wds[image_dir] = wd
+
+def watch():
+    global index_conn
+
+    # without the persistent index, an in-memory one still drives the polling fallback
+    index_conn = library_index.open_index(source_dir, index_path if use_library_index else ':memory:')
+    log_path = log_dir + 'daemon_' + get_log_name()
+
+    q = queue.Queue()
+    start_verifiers()
+    for i in range(daemon_worker_count):
+        workerThread = threading.Thread(target=work, args=[f'D{i:02d}', q, None], daemon=True)
+        workerThread.start()
+
+    inotify_fd = library_watch.open_inotify()
+    root_wd = None
+    if inotify_fd != None:
+        root_wd = library_watch.add_watch(inotify_fd, source_dir, daemon_root_mask)
+        if root_wd < 0:
+            os.close(inotify_fd)
+            inotify_fd = None
+
+    watched = {} # wd -> item dir
+    item_wds = {} # item dir -> wd
+    pending = {} # item dir -> time first seen
+
+    mode = 'inotify and ' if inotify_fd != None else ''
+    mode += f'polling every {daemon_poll_interval:.0f}s'
+    safe_print(f'watching {source_dir} ({mode})')
+
+    # catch up on whatever landed while we weren't running, the root watch is
+    # already in place so nothing new slips between this and the event loop
+    changed = library_index.refresh(index_conn, source_dir)
+    for image_dir in library_index.get_convertible_dirs(index_conn, valid_extensions, index_skipped_outcomes):
+        enqueue_item(q, image_dir)
+
+    # items still missing files might be mid-copy, old ones time out on the first check
+    for image_dir in set(changed) & set(library_index.get_incomplete_dirs(index_conn)):
+        pending[image_dir] = os.path.getmtime(image_dir)
+        watch_item(inotify_fd, image_dir, watched, item_wds)
+
+    last_poll = time.time()
+    tick = min(daemon_settle_time, daemon_poll_interval) / 2
+
+    try:
+        while True:
+            if inotify_fd != None:
+                events = library_watch.read_events(inotify_fd, tick)
+            else:
+                events = []
+                time.sleep(tick)
+
+            now = time.time()
+            for wd, mask, name in events:
+                if mask & library_watch.IN_Q_OVERFLOW:
+                    # events were dropped, let the index tell us what changed
+                    for image_dir in library_index.refresh(index_conn, source_dir):
+                        pending.setdefault(image_dir, now)
+                        watch_item(inotify_fd, image_dir, watched, item_wds)
+                elif mask & library_watch.IN_IGNORED:
+                    image_dir = watched.pop(wd, None)
+                    if item_wds.get(image_dir) == wd:
+                        del item_wds[image_dir]
+                elif wd == root_wd:
+                    if mask & library_watch.IN_ISDIR:
+                        image_dir = os.path.join(source_dir, name)
+                        pending.setdefault(image_dir, now)
+                        watch_item(inotify_fd, image_dir, watched, item_wds)
+                elif wd in watched:
+                    pending.setdefault(watched[wd], now)
+
+            if now - last_poll >= daemon_poll_interval:
+                last_poll = now
+                for image_dir in library_index.refresh(index_conn, source_dir):
+                    pending.setdefault(image_dir, now)
+                    watch_item(inotify_fd, image_dir, watched, item_wds)
+
+            for image_dir, since in list(pending.items()):
+                state = get_item_state(image_dir)
+                if state == 'waiting' and now - since < daemon_pending_timeout:
+                    continue
+
+                if state == 'ready':
+                    enqueue_item(q, image_dir)
+                elif state == 'waiting':
+                    safe_print(f'[daemon] {image_dir} never got both metadata and image, giving up')
+
+                del pending[image_dir]
+                wd = item_wds.pop(image_dir, None)
+                if wd != None:
+                    library_watch.rm_watch(inotify_fd, wd)
+
+            flush_log(log_path)
+    except KeyboardInterrupt:
+        safe_print('\nstopping, finishing queued items')
+
+    q.join()
+    wait_for_verifiers()
+    safe_print(get_outcome_text(outcomes))
+    flush_log(log_path)
+
+    if inotify_fd != None:
+        os.close(inotify_fd)
+    index_conn.close()
+
+def get_run_report_text(reports):
+    merged_outcomes = dict.fromkeys(outcomes, 0)
+    fight_count = 0
+    lossless_win_count = 0
+    for report in reports:
+        for outcome, count in report['outcomes'].items():
+            merged_outcomes[outcome] = merged_outcomes.get(outcome, 0) + count
+
+        fight_count += report['jxl_fight_count']
+        lossless_win_count += report['jxl_lossless_win_count']
+
+    elapsed = max([a['finished'] for a in reports]) - min([a['started'] for a in reports])
+    processed_count = sum(merged_outcomes.values())
+    converted_count = sum([merged_outcomes[a] for a in success_outcomes])
+
+    result = f'run {shard_run_id} on {len(reports)} nodes\n'
+    for report in reports:
+        node_count = sum(report['outcomes'].values())
+        result += f"{report['node_id']}: {node_count} files in {report['elapsed']:.2f}s\n"
+
+    result += f'\nconverted {converted_count} files out of {processed_count}\n'
+    if fight_count != 0:
+        result += f'jxl lossless wins: {(lossless_win_count / fight_count):.2%} ({lossless_win_count}/{fight_count})\n'
+
+    result += get_outcome_text(merged_outcomes) + '\n'
+    result += f'\nfinished in {elapsed:.2f}s, {(processed_count / elapsed):.2f} files/s\n'
+
+    for report in reports:
+        result += f"\n--- {report['node_id']} ---\n{report['log']}"
+
+    return result
+
+def write_run_report(started, finished):
+    report = {
+        'node_id': node_id,
+        'started': started,
+        'finished': finished,
+        'elapsed': finished - started,
+        'outcomes': outcomes,
+        'jxl_fight_count': jxl_fight_count,
+        'jxl_lossless_win_count': jxl_lossless_win_count,
+        'log': conversion_log
+    }
+    library_lease.write_node_report(run_dir, node_id, report)
+
+    # every node rewrites the merged report when it finishes, re-reading afterwards
+    # makes sure a node finishing at the same time can't leave out the other one
+    report_path = os.path.join(run_dir, 'report.log')
+    reports = []
+    while True:
+        latest_reports = library_lease.read_node_reports(run_dir)
+        if len(latest_reports) == len(reports):
+            break
+
+        reports = latest_reports
+        temp_path = f'{report_path}.{node_id}.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(get_run_report_text(reports))
+        os.replace(temp_path, report_path)
+
+    safe_print(f'run report for {len(reports)} nodes written to {report_path}')
+
 def main():
+    global run_dir
+
+    if daemon_mode:
+        watch()
+        return
+
     size = get_size(source_dir)
-    image_dirs = [f.path for f in os.scandir(source_dir) if f.is_dir()]
+    image_dirs = get_image_dirs()
 
-    total_count = len(image_dirs)
+    if shard_run_id != None:
+        run_dir = library_lease.open_run(shard_dir or library_lease.get_shard_dir(source_dir), shard_run_id)
+        library_lease.start_heartbeat(shard_lease_time, node_id)
+
+        # every node walks the items in its own order so they don't all fight over the same ones
+        random.Random(node_id).shuffle(image_dirs)
+        safe_print(f'node {node_id} joining run {shard_run_id}')
 
     start = time.time()
     safe_print(f'starting conversion of {source_dir}')
@@ -527,18 +1042,32 @@ def main():
     new_size = get_size(source_dir)
     reduction = (1 - (new_size / size)) * -100
 
+    # with sharding this node only processed its share of image_dirs
+    processed_count = sum(outcomes.values())
     converted_count = sum([outcomes[a] for a in success_outcomes])
-    safe_print(f'converted {converted_count} files out of {total_count} ({(converted_count / total_count):.2%})')
+    converted_ratio = converted_count / processed_count if processed_count != 0 else 0
+    safe_print(f'converted {converted_count} files out of {processed_count} ({converted_ratio:.2%})')
     safe_print(f'old size: {human_size(size, True)}, new size: {human_size(new_size, True)}, reduction: {reduction:.2f}%')
 
     if jxl_fighting_enabled and jxl_fight_count != 0:
         safe_print(f'jxl lossless wins: {(jxl_lossless_win_count / jxl_fight_count):.2%} ({jxl_lossless_win_count}/{jxl_fight_count})')
 
     safe_print(get_outcome_text(outcomes))
-    safe_print(f'\nfinished in {elapsed:.2f}s, {(total_count / elapsed):.2f} files/s')
+    safe_print(f'\nfinished in {elapsed:.2f}s, {(processed_count / elapsed):.2f} files/s')
+
+    if index_conn != None:
+        index_conn.close()
+
+    if run_dir != None:
+        write_run_report(start, end)
+
+    log_name = get_log_name()
+    if run_dir != None:
+        log_name = log_name.replace('.log', f'_{node_id}.log')
 
-    log_path = log_dir + get_log_name()
+    log_path = log_dir + log_name
     with open(log_path, 'w') as file:
         file.write(conversion_log)
 
-main()
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,18 @@ import threading
 import queue
 import time
 
+import library_index
+
 input_dir = '/Volumes/Athena/river-lib/huge_jpg_lib'
 
 worker_count = 8
 converted_extensions = ['avif', 'jxl', 'webp']
 valid_extensions = ['jpg', 'jpeg']
 
+use_library_index = True
+index_path = None # defaults to <input_dir>.index.sqlite
+index_conn = None
+
 print_log_lock = threading.Lock()
 
 def safe_print(*a, **b):
@@ -64,6 +70,9 @@ def work(name, queue, total_count):
     while True:
         index, image_dir = queue.get()
         did_convert = process_one(image_dir, index, total_count, name)
+        if index_conn != None:
+            library_index.update_item(index_conn, image_dir)
+
         queue.task_done()
 
 def start_work(image_dirs):
@@ -82,8 +91,22 @@ def start_work(image_dirs):
     q.join()
     safe_print('all work completed')
 
+def get_image_dirs():
+    global index_conn
+
+    if not use_library_index:
+        return [f.path for f in os.scandir(input_dir) if f.is_dir()]
+
+    # only candidates, process_one still checks the dir itself before purging
+    index_conn = library_index.open_index(input_dir, index_path)
+    library_index.refresh(index_conn, input_dir)
+    return library_index.get_bad_dirs(index_conn, valid_extensions)
+
 def main():
-    image_dirs = [f.path for f in os.scandir(input_dir) if f.is_dir()]
+    image_dirs = get_image_dirs()
     start_work(image_dirs)
 
+    if index_conn != None:
+        index_conn.close()
+
 main()